@@ -1,10 +1,153 @@
 import asyncio
+import functools
 import json
+import time
+import uuid
+from enum import Enum
 from typing import Any, Literal
 
+from google.auth.credentials import with_scopes_if_required
+from google.auth.transport.requests import AuthorizedSession
 from google.cloud import bigquery
 from google.oauth2 import credentials
 from loguru import logger
+from requests.adapters import HTTPAdapter
+
+try:
+    import orjson
+
+    def _json_dumps_compact(value: Any) -> str:
+        return orjson.dumps(value).decode()
+
+except ImportError:
+
+    def _json_dumps_compact(value: Any) -> str:
+        return json.dumps(value, separators=(",", ":"))
+
+
+class MigrateMode(Enum):
+    """Schema migration mode for existing tables."""
+
+    WEAK = "weak"
+    BALANCED = "balanced"
+    HARD = "hard"
+
+
+# How long cached table metadata stays valid, in seconds
+_TABLE_CACHE_TTL = 30.0
+
+# Mappings from Port string formats and base types to BigQuery field types
+_FORMAT_MAPPING = {
+    "url": "STRING",
+    "email": "STRING",
+    "markdown": "STRING",
+    "user": "STRING",
+    "date-time": "TIMESTAMP",
+}
+_TYPE_MAPPING = {
+    "string": "STRING",
+    "number": "FLOAT64",
+    "boolean": "BOOL",
+    "array": "STRING",  # Storing arrays as JSON strings
+    "object": "STRING",  # Storing objects as JSON strings
+    "datetime": "TIMESTAMP",
+}
+
+
+def _table_fqn(table: bigquery.Table | bigquery.TableReference) -> str:
+    """Return the backtick-quoted fully qualified name of a table.
+
+    Args:
+        table: The table or table reference.
+
+    Returns:
+        The name as `project.dataset.table`.
+    """
+    return f"`{table.project}.{table.dataset_id}.{table.table_id}`"
+
+
+@functools.lru_cache(maxsize=512)
+def _map_port_type_to_bigquery(port_type: str, format: str | None = None) -> str:
+    """Map Port entity types to BigQuery field types.
+
+    Args:
+        port_type: The Port entity type.
+        format: Optional format specification for the type.
+
+    Returns:
+        Corresponding BigQuery field type.
+    """
+    port_type = port_type.lower()
+    # First check if it's a string with a specific format
+    if port_type == "string" and format:
+        return _FORMAT_MAPPING.get(format.lower(), "STRING")
+
+    # Then check the base type
+    return _TYPE_MAPPING.get(port_type, "STRING")
+
+
+@functools.lru_cache(maxsize=256)
+def _schema_fields_for_blueprint(blueprint_json: str) -> tuple[bigquery.SchemaField, ...]:
+    """Build the BigQuery schema for a blueprint in canonical JSON form.
+
+    Memoized so byte-identical blueprints don't rebuild the schema.
+
+    Args:
+        blueprint_json: The blueprint serialized with sorted keys.
+
+    Returns:
+        Tuple of BigQuery schema fields.
+    """
+    blueprint = json.loads(blueprint_json)
+    # All fields except identifier are nullable to handle migrations easily
+    schema = [
+        bigquery.SchemaField("identifier", "STRING", mode="REQUIRED"),
+        bigquery.SchemaField("title", "STRING", mode="NULLABLE"),
+        bigquery.SchemaField("created_at", "TIMESTAMP", mode="NULLABLE"),
+        bigquery.SchemaField("updated_at", "TIMESTAMP", mode="NULLABLE"),
+    ]
+
+    # Handle properties
+    for prop_name, prop_details in blueprint.get("schema", {}).get("properties", {}).items():
+        field_type = _map_port_type_to_bigquery(prop_details.get("type", "string"), prop_details.get("format"))
+        schema.append(bigquery.SchemaField(prop_name, field_type, mode="NULLABLE"))
+
+    # Handle relations (many-relations are stored as JSON arrays of identifiers)
+    for relation_name, relation_details in blueprint.get("relations", {}).items():
+        if relation_details.get("many", False):
+            description = f"JSON array of {relation_name} identifiers"
+            schema.append(bigquery.SchemaField(relation_name, "STRING", mode="NULLABLE", description=description))
+        else:
+            schema.append(bigquery.SchemaField(relation_name, "STRING", mode="NULLABLE"))
+
+    # Handle calculation and aggregation properties
+    for section, description_prefix in (
+        ("calculationProperties", "Calculated property"),
+        ("aggregationProperties", "Aggregation property"),
+    ):
+        for name, details in blueprint.get(section, {}).items():
+            field_type = _map_port_type_to_bigquery(details.get("type", "string"), details.get("format"))
+            schema.append(
+                bigquery.SchemaField(
+                    name,
+                    field_type,
+                    mode="NULLABLE",
+                    description=f"{description_prefix}: {details.get('description', '')}",
+                )
+            )
+
+    # Handle mirror properties
+    for mirror_name, mirror_details in blueprint.get("mirrorProperties", {}).items():
+        schema.append(
+            bigquery.SchemaField(
+                mirror_name,
+                "STRING",
+                mode="NULLABLE",
+                description=f"Mirror property from path: {mirror_details.get('path', '')}",
+            )
+        )
+
+    return tuple(schema)
 
 
 class BigQueryClient:
@@ -27,6 +170,11 @@ class BigQueryClient:
         dataset_id: str,
         credentials: credentials.Credentials,
         auto_migrate: Literal["weak", "balanced", "hard"] = "weak",
+        load_batch_size: int = 10_000,
+        max_concurrent_loads: int = 4,
+        max_concurrent_queries: int = 16,
+        pool_size: int = 64,
+        buffer_max_rows: int = 10_000,
     ):
         """Initialize the BigQuery client.
 
@@ -35,244 +183,134 @@ class BigQueryClient:
             dataset_id: BigQuery dataset ID.
             credentials: Google Cloud credentials.
             auto_migrate: Schema migration mode ('weak', 'balanced', or 'hard').
+            load_batch_size: Maximum number of rows per load job.
+            max_concurrent_loads: Maximum number of load jobs in flight at once.
+            max_concurrent_queries: Maximum number of query jobs in flight at
+                once; tune per workload and project quota.
+            pool_size: Size of the HTTP connection pool used for BigQuery API
+                calls; should be at least the expected concurrency.
+            buffer_max_rows: Number of buffered entities per table that
+                triggers a flush in enqueue_entities.
         """
-        self.client = bigquery.Client(project=project_id, credentials=credentials)
+        # The default transport pool (~10 connections) serializes concurrent
+        # API calls, so mount a pool sized to the expected concurrency. The
+        # session bypasses bigquery.Client's own credential scoping, so scope
+        # here: unscoped service-account credentials fail to refresh
+        http_session = AuthorizedSession(with_scopes_if_required(credentials, bigquery.Client.SCOPE))
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        http_session.mount("https://", adapter)
+        http_session.mount("http://", adapter)
+        self.client = bigquery.Client(project=project_id, credentials=credentials, _http=http_session)
         self.dataset_id = dataset_id
         self.dataset_ref = bigquery.DatasetReference(project_id, dataset_id)
-        self.auto_migrate = auto_migrate.lower()
-        if self.auto_migrate not in ["weak", "balanced", "hard"]:
-            raise ValueError("auto_migrate must be one of: 'weak', 'balanced', 'hard'")
-
-    def _map_port_type_to_bigquery(self, port_type: str, format: str | None = None) -> str:
-        """Map Port entity types to BigQuery field types.
-
-        Args:
-            port_type: The Port entity type.
-            format: Optional format specification for the type.
-
-        Returns:
-            Corresponding BigQuery field type.
-        """
-        # First check if it's a string with a specific format
-        if port_type.lower() == "string" and format:
-            format_mapping = {
-                "url": "STRING",
-                "email": "STRING",
-                "markdown": "STRING",
-                "user": "STRING",
-                "date-time": "TIMESTAMP",
-            }
-            return format_mapping.get(format.lower(), "STRING")
-
-        # Then check the base type
-        type_mapping = {
-            "string": "STRING",
-            "number": "FLOAT64",
-            "boolean": "BOOL",
-            "array": "STRING",  # Storing arrays as JSON strings
-            "object": "STRING",  # Storing objects as JSON strings
-            "datetime": "TIMESTAMP",
-        }
-        return type_mapping.get(port_type.lower(), "STRING")
-
-    def _create_property_fields(
-        self, properties: dict[str, Any], required_properties: list[str]
-    ) -> list[bigquery.SchemaField]:
-        """Create schema fields for Port properties.
-
-        Args:
-            properties: Dictionary of property definitions.
-            required_properties: List of required property names (ignored).
-
-        Returns:
-            List of schema fields for properties.
-        """
-        fields = []
-        for prop_name, prop_details in properties.items():
-            field_type = self._map_port_type_to_bigquery(prop_details.get("type", "string"), prop_details.get("format"))
-            # All fields are nullable to handle migrations easily
-            fields.append(bigquery.SchemaField(prop_name, field_type, mode="NULLABLE"))
-        return fields
-
-    def _create_relation_fields(self, relations: dict[str, Any]) -> list[bigquery.SchemaField]:
-        """Create schema fields for Port relations.
-
-        Args:
-            relations: Dictionary of relation definitions.
-
-        Returns:
-            List of schema fields for relations.
-        """
-        fields = []
-        for relation_name, relation_details in relations.items():
-            is_many = relation_details.get("many", False)
-            # All fields are nullable to handle migrations easily
-            if is_many:
-                fields.append(
-                    bigquery.SchemaField(
-                        relation_name,
-                        "STRING",
-                        mode="NULLABLE",
-                        description=f"JSON array of {relation_name} identifiers",
-                    )
-                )
-            else:
-                fields.append(bigquery.SchemaField(relation_name, "STRING", mode="NULLABLE"))
-        return fields
+        self.load_batch_size = load_batch_size
+        self._load_sem = asyncio.Semaphore(max_concurrent_loads)
+        self._query_sem = asyncio.Semaphore(max_concurrent_queries)
+        self._table_cache: dict[str, tuple[float, bigquery.Table, frozenset[str]]] = {}
+        self.buffer_max_rows = buffer_max_rows
+        self._entity_buffers: dict[str, list[dict[str, Any]]] = {}
+        try:
+            self.auto_migrate = MigrateMode(auto_migrate.lower())
+        except ValueError:
+            raise ValueError("auto_migrate must be one of: 'weak', 'balanced', 'hard'") from None
 
-    def _create_calculation_fields(self, calculation_properties: dict[str, Any]) -> list[bigquery.SchemaField]:
-        """Create schema fields for calculation properties.
+    async def _run_query(self, query: str, job_config: bigquery.QueryJobConfig | None = None) -> None:
+        """Run a query job to completion under the concurrency cap.
 
         Args:
-            calculation_properties: Dictionary of calculation property definitions.
-
-        Returns:
-            List of schema fields for calculation properties.
+            query: The SQL statement to execute.
+            job_config: Optional query job configuration.
         """
-        fields = []
-        for calc_name, calc_details in calculation_properties.items():
-            field_type = self._map_port_type_to_bigquery(calc_details.get("type", "string"), calc_details.get("format"))
-            fields.append(
-                bigquery.SchemaField(
-                    calc_name,
-                    field_type,
-                    mode="NULLABLE",
-                    description=f"Calculated property: {calc_details.get('description', '')}",
-                )
-            )
-        return fields
+        async with self._query_sem:
+            query_job = await asyncio.to_thread(self.client.query, query, job_config)
+            await asyncio.to_thread(query_job.result)
 
-    def _create_aggregation_fields(self, aggregation_properties: dict[str, Any]) -> list[bigquery.SchemaField]:
-        """Create schema fields for aggregation properties.
+    def _invalidate_table_cache(self, table_id: str) -> None:
+        """Drop the cached metadata for a table.
 
         Args:
-            aggregation_properties: Dictionary of aggregation property definitions.
-
-        Returns:
-            List of schema fields for aggregation properties.
+            table_id: ID of the table to invalidate.
         """
-        fields = []
-        for agg_name, agg_details in aggregation_properties.items():
-            field_type = self._map_port_type_to_bigquery(agg_details.get("type", "string"), agg_details.get("format"))
-            fields.append(
-                bigquery.SchemaField(
-                    agg_name,
-                    field_type,
-                    mode="NULLABLE",
-                    description=f"Aggregation property: {agg_details.get('description', '')}",
-                )
-            )
-        return fields
+        self._table_cache.pop(table_id, None)
 
-    def _create_mirror_fields(self, mirror_properties: dict[str, Any]) -> list[bigquery.SchemaField]:
-        """Create schema fields for mirror properties.
+    async def _get_table_cached(
+        self, table_ref: bigquery.TableReference, ttl: float = _TABLE_CACHE_TTL
+    ) -> tuple[bigquery.Table, frozenset[str]]:
+        """Get table metadata and its field names, reusing a recent fetch when possible.
 
         Args:
-            mirror_properties: Dictionary of mirror property definitions.
+            table_ref: Reference to the BigQuery table.
+            ttl: How long a cached entry stays valid, in seconds.
 
         Returns:
-            List of schema fields for mirror properties.
+            Tuple of the BigQuery table and the frozenset of its field names.
         """
-        fields = []
-        for mirror_name, mirror_details in mirror_properties.items():
-            fields.append(
-                bigquery.SchemaField(
-                    mirror_name,
-                    "STRING",
-                    mode="NULLABLE",
-                    description=f"Mirror property from path: {mirror_details.get('path', '')}",
-                )
-            )
-        return fields
+        cached = self._table_cache.get(table_ref.table_id)
+        if cached and time.monotonic() - cached[0] < ttl:
+            return cached[1], cached[2]
+        table = await asyncio.to_thread(self.client.get_table, table_ref)
+        schema_fields = frozenset(field.name for field in table.schema)
+        self._table_cache[table_ref.table_id] = (time.monotonic(), table, schema_fields)
+        return table, schema_fields
 
     def _create_schema_from_blueprint(self, blueprint: dict[str, Any]) -> list[bigquery.SchemaField]:
         """Create BigQuery schema from Port blueprint.
 
+        Delegates to a memoized builder keyed on the blueprint's canonical
+        JSON form, so repeated exports of an unchanged blueprint reuse the
+        previously built schema.
+
         Args:
             blueprint: Port blueprint containing schema information.
 
         Returns:
             List of BigQuery schema fields.
         """
-        # All fields except identifier are nullable to handle migrations easily
-        schema = [
-            bigquery.SchemaField("identifier", "STRING", mode="REQUIRED"),
-            bigquery.SchemaField("title", "STRING", mode="NULLABLE"),
-            bigquery.SchemaField("created_at", "TIMESTAMP", mode="NULLABLE"),
-            bigquery.SchemaField("updated_at", "TIMESTAMP", mode="NULLABLE"),
-        ]
-
-        # Handle properties
-        properties = blueprint.get("schema", {}).get("properties", {})
-        required_properties = blueprint.get("schema", {}).get("required", [])
-        schema.extend(self._create_property_fields(properties, required_properties))
-
-        # Handle relations
-        relations = blueprint.get("relations", {})
-        schema.extend(self._create_relation_fields(relations))
-
-        # Handle calculation properties
-        calculation_properties = blueprint.get("calculationProperties", {})
-        schema.extend(self._create_calculation_fields(calculation_properties))
-
-        # Handle aggregation properties
-        aggregation_properties = blueprint.get("aggregationProperties", {})
-        schema.extend(self._create_aggregation_fields(aggregation_properties))
+        return list(_schema_fields_for_blueprint(json.dumps(blueprint, sort_keys=True)))
 
-        # Handle mirror properties
-        mirror_properties = blueprint.get("mirrorProperties", {})
-        schema.extend(self._create_mirror_fields(mirror_properties))
-
-        return schema
-
-    async def _get_existing_schema_fields(self, table_ref: bigquery.TableReference) -> set[str]:
-        """Get existing schema fields from a BigQuery table.
+    def _compare_schemas(
+        self, existing_fields: frozenset[str], new_fields: frozenset[str]
+    ) -> dict[str, frozenset[str]]:
+        """Compare existing and new schema fields.
 
         Args:
-            table_ref: Reference to the BigQuery table.
+            existing_fields: Frozenset of existing field names.
+            new_fields: Frozenset of new field names.
 
         Returns:
-            Set of existing field names.
+            Dictionary containing frozensets of added, removed, and unchanged fields.
         """
-        try:
-            table = await asyncio.to_thread(self.client.get_table, table_ref)
-            fields = {field.name for field in table.schema}
-            logger.debug(f"Existing schema fields for {table_ref.table_id}: {fields}")
-            return fields
-        except Exception as e:
-            logger.debug(f"No existing table found for {table_ref.table_id}: {str(e)}")
-            return set()
+        if existing_fields == new_fields:
+            # Common case: nothing changed, skip the diffs entirely
+            return {"added": frozenset(), "removed": frozenset(), "unchanged": existing_fields}
 
-    def _get_new_schema_fields(self, schema: list[bigquery.SchemaField]) -> set[str]:
-        """Get field names from a new schema.
-
-        Args:
-            schema: List of BigQuery schema fields.
+        changes = {
+            "added": new_fields - existing_fields,
+            "removed": existing_fields - new_fields if self.auto_migrate is MigrateMode.HARD else frozenset(),
+            "unchanged": existing_fields & new_fields,
+        }
+        logger.opt(lazy=True).debug("Schema comparison results: {}", lambda: changes)
+        return changes
 
-        Returns:
-            Set of field names.
-        """
-        fields = {field.name for field in schema}
-        logger.debug(f"New schema fields: {fields}")
-        return fields
+    async def needs_schema(self, table_id: str) -> bool:
+        """Check whether create_or_update_table will need a built schema.
 
-    def _compare_schemas(self, existing_fields: set[str], new_fields: set[str]) -> dict[str, set[str]]:
-        """Compare existing and new schema fields.
+        In weak mode an existing table is left untouched, so callers can skip
+        building the blueprint schema entirely when the table already exists.
 
         Args:
-            existing_fields: Set of existing field names.
-            new_fields: Set of new field names.
+            table_id: ID of the table to check.
 
         Returns:
-            Dictionary containing sets of added, removed, and unchanged fields.
+            True if a schema must be supplied for this table.
         """
-        changes = {
-            "added": new_fields - existing_fields,
-            "removed": existing_fields - new_fields if self.auto_migrate == "hard" else set(),
-            "unchanged": existing_fields & new_fields,
-        }
-        logger.debug(f"Schema comparison results: {changes}")
-        return changes
+        if self.auto_migrate is not MigrateMode.WEAK:
+            return True
+        try:
+            await self._get_table_cached(self.dataset_ref.table(table_id))
+            return False
+        except Exception:
+            return True
 
     async def create_or_update_table(self, table_id: str, schema: list[bigquery.SchemaField]) -> None:
         """Create or update a BigQuery table with the given schema.
@@ -282,49 +320,63 @@ class BigQueryClient:
             schema: List of BigQuery schema fields.
         """
         table_ref = self.dataset_ref.table(table_id)
-        logger.info(f"Processing table {table_id} in {self.auto_migrate} mode")
+        logger.info(f"Processing table {table_id} in {self.auto_migrate.value} mode")
 
-        if self.auto_migrate == "weak":
+        if self.auto_migrate is MigrateMode.WEAK:
             try:
-                table = await asyncio.to_thread(self.client.get_table, table_ref)
+                await self._get_table_cached(table_ref)
                 logger.info(f"Table {table_id} already exists, no changes made (weak mode)")
                 return
             except Exception:
                 table = bigquery.Table(table_ref, schema=schema)
+                # Cluster on identifier so MERGE and identifier lookups scan less
+                table.clustering_fields = ["identifier"]
+                # Partition by update day so time-bounded queries prune partitions
+                table.time_partitioning = bigquery.TimePartitioning(
+                    type_=bigquery.TimePartitioningType.DAY, field="updated_at"
+                )
                 table = await asyncio.to_thread(self.client.create_table, table)
                 logger.info(f"Created table {table_id}")
                 return
 
         try:
-            existing_table = await asyncio.to_thread(self.client.get_table, table_ref)
+            existing_table, existing_fields = await self._get_table_cached(table_ref)
             logger.debug(f"Found existing table {table_id}")
 
-            existing_fields = await self._get_existing_schema_fields(table_ref)
-            new_fields = self._get_new_schema_fields(schema)
-
+            new_fields = frozenset(field.name for field in schema)
             schema_changes = self._compare_schemas(existing_fields, new_fields)
 
             if not schema_changes["added"] and not schema_changes["removed"]:
                 logger.info(f"Table {table_id} schema is up to date")
                 return
 
-            if schema_changes["added"]:
+            removing = self.auto_migrate is MigrateMode.HARD and schema_changes["removed"]
+            if schema_changes["added"] and removing:
+                # Apply both changes in one ALTER TABLE instead of two round trips
+                await self._migrate_table_fields(
+                    existing_table, schema, schema_changes["added"], schema_changes["removed"]
+                )
+            elif schema_changes["added"]:
                 await self._add_fields_to_table(existing_table, schema, schema_changes["added"])
-
-            if self.auto_migrate == "hard" and schema_changes["removed"]:
+            elif removing:
                 await self._remove_fields_from_table(existing_table, schema_changes["removed"])
-            elif schema_changes["removed"]:
+
+            if schema_changes["removed"] and not removing:
                 logger.info(f"Fields would be removed in hard mode: {schema_changes['removed']}")
 
         except Exception as e:
             logger.error(f"Error processing table {table_id}: {str(e)}")
             # Table doesn't exist, create it
             table = bigquery.Table(table_ref, schema=schema)
+            table.clustering_fields = ["identifier"]
+            table.time_partitioning = bigquery.TimePartitioning(
+                type_=bigquery.TimePartitioningType.DAY, field="updated_at"
+            )
             table = await asyncio.to_thread(self.client.create_table, table)
             logger.info(f"Created new table {table_id}")
 
     async def _add_fields_to_table(
-        self, table: bigquery.Table, schema: list[bigquery.SchemaField], fields_to_add: set[str]
+        self, table: bigquery.Table, schema: list[bigquery.SchemaField], fields_to_add: frozenset[str]
     ) -> None:
         """Add new fields to an existing table.
 
@@ -334,63 +386,74 @@ class BigQueryClient:
             fields_to_add: Set of field names to add.
         """
         logger.info(f"Adding new fields to {table.table_id}: {fields_to_add}")
-        new_schema = table.schema.copy()
-        for field in schema:
-            if field.name in fields_to_add:
-                logger.debug(f"Adding field {field.name} with type {field.field_type}")
-                new_schema.append(field)
-        table.schema = new_schema
+        # Single concatenation, keeping added fields in schema order
+        table.schema = list(table.schema) + [field for field in schema if field.name in fields_to_add]
         try:
             await asyncio.to_thread(self.client.update_table, table, ["schema"])
+            self._invalidate_table_cache(table.table_id)
             logger.info(f"Successfully updated schema for {table.table_id}")
         except Exception as e:
             logger.error(f"Failed to update schema for {table.table_id}: {str(e)}")
             raise
 
-    async def _remove_fields_from_table(self, table: bigquery.Table, fields_to_remove: set[str]) -> None:
-        """Remove fields from an existing table.
+    async def _migrate_table_fields(
+        self,
+        table: bigquery.Table,
+        schema: list[bigquery.SchemaField],
+        fields_to_add: frozenset[str],
+        fields_to_remove: frozenset[str],
+    ) -> None:
+        """Add and remove fields with a single ALTER TABLE statement.
 
         Args:
             table: The BigQuery table to update.
+            schema: List of all schema fields.
+            fields_to_add: Set of field names to add.
             fields_to_remove: Set of field names to remove.
         """
-        logger.info(f"Removing fields from {table.table_id}: {fields_to_remove}")
+        logger.info(f"Migrating {table.table_id}: adding {fields_to_add}, removing {fields_to_remove}")
 
-        # Create a single ALTER TABLE statement with all columns to drop
+        add_clauses = [
+            f"ADD COLUMN IF NOT EXISTS {field.name} {field.field_type}"
+            for field in schema
+            if field.name in fields_to_add
+        ]
+        drop_clauses = [f"DROP COLUMN IF EXISTS {name}" for name in fields_to_remove]
         alter_query = f"""
-            ALTER TABLE `{table.project}.{table.dataset_id}.{table.table_id}`
-            DROP COLUMN IF EXISTS {', DROP COLUMN IF EXISTS '.join(fields_to_remove)}
+            ALTER TABLE {_table_fqn(table)}
+            {', '.join(add_clauses + drop_clauses)}
         """
         try:
-            query_job = await asyncio.to_thread(self.client.query, alter_query)
-            await asyncio.to_thread(query_job.result)
-            logger.info(f"Successfully removed columns from {table.table_id}: {fields_to_remove}")
+            await self._run_query(alter_query)
+            self._invalidate_table_cache(table.table_id)
+            logger.info(f"Successfully migrated schema for {table.table_id}")
         except Exception as e:
-            logger.error(f"Failed to remove columns from {table.table_id}: {str(e)}")
+            logger.error(f"Failed to migrate schema for {table.table_id}: {str(e)}")
             raise
 
-    async def _get_existing_identifiers(self, table: bigquery.Table) -> set[str]:
-        """Get existing entity identifiers from a table.
+    async def _remove_fields_from_table(self, table: bigquery.Table, fields_to_remove: frozenset[str]) -> None:
+        """Remove fields from an existing table.
 
         Args:
-            table: The BigQuery table to query.
-
-        Returns:
-            Set of existing entity identifiers.
+            table: The BigQuery table to update.
+            fields_to_remove: Set of field names to remove.
         """
-        query = f"""
-            SELECT identifier FROM `{table.project}.{table.dataset_id}.{table.table_id}`
+        logger.info(f"Removing fields from {table.table_id}: {fields_to_remove}")
+
+        # Create a single ALTER TABLE statement with all columns to drop
+        alter_query = f"""
+            ALTER TABLE {_table_fqn(table)}
+            DROP COLUMN IF EXISTS {', DROP COLUMN IF EXISTS '.join(fields_to_remove)}
         """
-        existing_identifiers = set()
         try:
-            query_job = await asyncio.to_thread(self.client.query, query)
-            for row in query_job:
-                existing_identifiers.add(row.identifier)
+            await self._run_query(alter_query)
+            self._invalidate_table_cache(table.table_id)
+            logger.info(f"Successfully removed columns from {table.table_id}: {fields_to_remove}")
         except Exception as e:
-            logger.debug(f"No existing identifiers found or error querying: {str(e)}")
-        return existing_identifiers
+            logger.error(f"Failed to remove columns from {table.table_id}: {str(e)}")
+            raise
 
-    def _prepare_entity_row(self, entity: dict[str, Any], schema_fields: set[str]) -> dict[str, Any]:
+    def _prepare_entity_row(self, entity: dict[str, Any], schema_fields: frozenset[str]) -> dict[str, Any]:
         """Prepare a single entity for insertion into BigQuery.
 
         Args:
@@ -400,12 +463,6 @@ class BigQueryClient:
         Returns:
             Dictionary representing the row to insert.
         """
-        def _convert_boolean_to_string(value: Any) -> Any:
-            """Convert boolean values to strings, leave other values unchanged."""
-            if isinstance(value, bool):
-                return str(value).lower()
-            return value
-
         row = {
             "identifier": entity["identifier"],
             "title": entity["title"],
@@ -414,151 +471,141 @@ class BigQueryClient:
         }
 
         # Add properties
-        for prop_name, prop_value in entity.get("properties", {}).items():
-            if prop_name in schema_fields:
-                row[prop_name] = prop_value
+        row.update((name, value) for name, value in entity.get("properties", {}).items() if name in schema_fields)
 
-        # Add relations
+        # Add relations (many-relations are serialized as JSON arrays)
         for relation_name, relation in entity.get("relations", {}).items():
             if relation_name in schema_fields:
                 if isinstance(relation, str):
                     row[relation_name] = relation
                 elif isinstance(relation, list):
-                    row[relation_name] = json.dumps(relation)
-
-        # Add calculation properties
-        for calc_name, calc_value in entity.get("calculationProperties", {}).items():
-            if calc_name in schema_fields:
-                row[calc_name] = _convert_boolean_to_string(calc_value)
+                    row[relation_name] = _json_dumps_compact(relation)
 
-        # Add aggregation properties
-        for agg_name, agg_value in entity.get("aggregationProperties", {}).items():
-            if agg_name in schema_fields:
-                row[agg_name] = _convert_boolean_to_string(agg_value)
-
-        # Add mirror properties
-        for mirror_name, mirror_value in entity.get("mirrorProperties", {}).items():
-            if mirror_name in schema_fields:
-                row[mirror_name] = _convert_boolean_to_string(mirror_value)
+        # Add calculation, aggregation, and mirror properties (booleans become strings)
+        for section in ("calculationProperties", "aggregationProperties", "mirrorProperties"):
+            for name, value in entity.get(section, {}).items():
+                if name in schema_fields:
+                    row[name] = str(value).lower() if isinstance(value, bool) else value
 
         return row
 
-    async def _execute_bulk_update(self, table: bigquery.Table, rows_to_update: list[dict[str, Any]]) -> None:
-        """Execute a bulk update for multiple rows.
+    async def _load_rows(
+        self,
+        table_ref: bigquery.TableReference,
+        schema: list[bigquery.SchemaField],
+        rows: list[dict[str, Any]],
+        truncate: bool = False,
+    ) -> None:
+        """Load rows into a table in batches.
+
+        Batches run concurrently, capped by max_concurrent_loads.
 
         Args:
-            table: The BigQuery table to update.
-            rows_to_update: List of rows to update, each containing an identifier and field values.
+            table_ref: Reference to the table to load into.
+            schema: Schema of the destination table.
+            rows: List of rows to load.
+            truncate: Whether to replace the table contents with the first batch.
         """
-        if not rows_to_update:
-            return
 
-        # Group rows by their field sets to create more efficient UPDATE statements
-        field_sets: dict[frozenset[str], list[tuple[str, dict[str, Any]]]] = {}
-        for row in rows_to_update:
-            identifier = row.pop("identifier")
-            field_set = frozenset(row.keys())
-            if field_set not in field_sets:
-                field_sets[field_set] = []
-            field_sets[field_set].append((identifier, row))
-
-        # Create a mapping of field names to their types
-        field_types = {field.name: field.field_type for field in table.schema}
-
-        async def _execute_single_update(identifier: str, row: dict[str, Any], fields: list[str]) -> None:
-            """Execute a single update query.
-
-            Args:
-                identifier: The entity identifier to update.
-                row: Dictionary of field values to update.
-                fields: List of fields being updated.
-            """
-            update_query = f"""
-                UPDATE `{table.project}.{table.dataset_id}.{table.table_id}`
-                SET {', '.join(f"{field} = @{field}" for field in fields)}
-                WHERE identifier = @identifier
-            """
-
-            query_parameters = []
-            for field in fields:
-                field_type = field_types.get(field, "STRING")
-                value = row[field]
-                if field_type == "TIMESTAMP" and isinstance(value, str):
-                    from datetime import datetime
-
-                    value = datetime.fromisoformat(value.replace("Z", "+00:00"))
-                query_parameters.append(bigquery.ScalarQueryParameter(field, field_type, value))
-            query_parameters.append(bigquery.ScalarQueryParameter("identifier", "STRING", identifier))
-
-            job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+        async def _load_batch(batch: list[dict[str, Any]], write_disposition: str) -> None:
+            job_config = bigquery.LoadJobConfig(
+                schema=schema,
+                source_format=bigquery.SourceFormat.NEWLINE_DELIMITED_JSON,
+                write_disposition=write_disposition,
+            )
+            async with self._load_sem:
+                load_job = await asyncio.to_thread(
+                    self.client.load_table_from_json, batch, table_ref, job_config=job_config
+                )
+                await asyncio.to_thread(load_job.result)
 
-            try:
-                query_job = await asyncio.to_thread(self.client.query, update_query, job_config)
-                await asyncio.to_thread(query_job.result)
-            except Exception as e:
-                logger.error(f"Error updating row with identifier {identifier}: {str(e)}")
+        batches = [rows[start : start + self.load_batch_size] for start in range(0, len(rows), self.load_batch_size)]
+        if truncate and batches:
+            # The truncating batch must finish before any appends run
+            await _load_batch(batches.pop(0), bigquery.WriteDisposition.WRITE_TRUNCATE)
+        if batches:
+            await asyncio.gather(*(_load_batch(batch, bigquery.WriteDisposition.WRITE_APPEND) for batch in batches))
 
-        # Process each field set sequentially to avoid serialization conflicts
-        for field_set, rows in field_sets.items():
-            fields = list(field_set)
-            logger.info(f"Processing {len(rows)} updates for field set: {fields}")
+    async def _merge_staging_into_table(self, table: bigquery.Table, staging_ref: bigquery.TableReference) -> None:
+        """Merge staged rows into the target table keyed on identifier.
 
-            # Process updates sequentially within each field set
-            for identifier, row in rows:
-                await _execute_single_update(identifier, row, fields)
+        Args:
+            table: The target BigQuery table.
+            staging_ref: Reference to the staging table holding the new rows.
+        """
+        columns = [field.name for field in table.schema]
+        update_columns = [column for column in columns if column != "identifier"]
+        merge_query = f"""
+            MERGE {_table_fqn(table)} T
+            USING {_table_fqn(staging_ref)} S
+            ON T.identifier = S.identifier
+            WHEN MATCHED THEN UPDATE SET {', '.join(f"T.{column} = S.{column}" for column in update_columns)}
+            WHEN NOT MATCHED THEN INSERT ({', '.join(columns)})
+            VALUES ({', '.join(f"S.{column}" for column in columns)})
+        """
+        await self._run_query(merge_query)
 
-            logger.info(f"Completed updates for field set: {fields}")
+    async def enqueue_entities(self, table_id: str, entities: list[dict[str, Any]]) -> None:
+        """Buffer entities for a table, flushing once the buffer is large enough.
 
-    async def cleanup_duplicates(self, table_id: str) -> None:
-        """Remove duplicate rows, keeping the most recently updated version.
+        Coalesces many small page-sized batches into fewer large upserts so
+        per-call overhead (metadata fetch, job setup) is amortized. Callers
+        must await flush() after the last batch to write out any remainder.
 
         Args:
-            table_id: ID of the table to clean up.
+            table_id: ID of the table the entities belong to.
+            entities: List of entities to buffer.
         """
-        table_ref = self.dataset_ref.table(table_id)
-        table = await asyncio.to_thread(self.client.get_table, table_ref)
+        buffer = self._entity_buffers.setdefault(table_id, [])
+        buffer.extend(entities)
+        if len(buffer) >= self.buffer_max_rows:
+            await self.flush(table_id)
 
-        cleanup_query = f"""
-            DELETE FROM `{table.project}.{table.dataset_id}.{table.table_id}` t1
-            WHERE EXISTS (
-                SELECT 1
-                FROM `{table.project}.{table.dataset_id}.{table.table_id}` t2
-                WHERE t1.identifier = t2.identifier
-                AND t1.updated_at < t2.updated_at
-            )
+    async def flush(self, table_id: str | None = None) -> None:
+        """Flush buffered entities to BigQuery.
+
+        Args:
+            table_id: Flush only this table's buffer, or all buffers if None.
         """
-        try:
-            query_job = await asyncio.to_thread(self.client.query, cleanup_query)
-            await asyncio.to_thread(query_job.result)
-            logger.info(f"Cleaned up duplicate rows in {table.table_id}")
-        except Exception as e:
-            logger.error(f"Error cleaning up duplicates in {table.table_id}: {str(e)}")
+        table_ids = [table_id] if table_id is not None else list(self._entity_buffers)
+        for buffered_table_id in table_ids:
+            buffer = self._entity_buffers.pop(buffered_table_id, None)
+            if buffer:
+                await self.insert_entities(buffered_table_id, buffer)
 
     async def insert_entities(self, table_id: str, entities: list[dict[str, Any]]) -> None:
-        """Insert entities into a BigQuery table.
+        """Upsert entities into a BigQuery table.
+
+        Rows are staged with batched load jobs and then merged into the target
+        table with a single MERGE statement, so inserts and updates are handled
+        server-side in one idempotent pass.
 
         Args:
-            table_id: ID of the table to insert into.
-            entities: List of entities to insert.
+            table_id: ID of the table to upsert into.
+            entities: List of entities to upsert.
         """
-        table_ref = self.dataset_ref.table(table_id)
-        table = await asyncio.to_thread(self.client.get_table, table_ref)
+        if not entities:
+            logger.debug(f"No entities to upsert into {table_id}")
+            return
 
-        # Get all field names from the table schema
-        schema_fields = {field.name for field in table.schema}
+        table_ref = self.dataset_ref.table(table_id)
+        table, schema_fields = await self._get_table_cached(table_ref)
 
-        # Prepare rows for insertion
-        rows_to_insert = []
-        for entity in entities:
-            row = self._prepare_entity_row(entity, schema_fields)
-            rows_to_insert.append(row)
+        # Prepare rows for upsert, keeping only the last row per identifier:
+        # cursor pagination can return the same entity on two pages when data
+        # changes mid-scan, and MERGE aborts if the source matches a target
+        # row more than once
+        deduped_rows = {entity["identifier"]: entity for entity in entities}
+        rows_to_insert = [self._prepare_entity_row(entity, schema_fields) for entity in deduped_rows.values()]
 
-        logger.info(f"Inserting {len(rows_to_insert)} rows into {table_id}")
+        logger.info(f"Upserting {len(rows_to_insert)} rows into {table_id}")
 
-        # Insert all rows
-        if rows_to_insert:
-            errors = await asyncio.to_thread(self.client.insert_rows_json, table, rows_to_insert)
-            if errors:
-                logger.error(f"Errors while inserting rows: {errors}")
-            else:
-                logger.info(f"Successfully inserted {len(rows_to_insert)} rows into {table_id}")
+        staging_ref = self.dataset_ref.table(f"_staging_{table_id}_{uuid.uuid4().hex[:8]}")
+        try:
+            await self._load_rows(staging_ref, table.schema, rows_to_insert, truncate=True)
+            await self._merge_staging_into_table(table, staging_ref)
+            logger.info(f"Successfully upserted {len(rows_to_insert)} rows into {table_id}")
+        except Exception as e:
+            logger.error(f"Errors while upserting rows: {str(e)}")
+        finally:
+            await asyncio.to_thread(self.client.delete_table, staging_ref, not_found_ok=True)
@@ -1,11 +1,43 @@
-from datetime import datetime, timedelta
+import asyncio
+import json
+import random
+import time
 from typing import Any, AsyncGenerator
 
 import httpx
-from dotenv import load_dotenv
 from loguru import logger
 
-load_dotenv()
+try:
+    import orjson
+
+    def _json_loads(data: bytes) -> Any:
+        return orjson.loads(data)
+
+    def _json_dumps(value: Any) -> bytes:
+        return orjson.dumps(value)
+
+except ImportError:
+
+    def _json_loads(data: bytes) -> Any:
+        return json.loads(data)
+
+    def _json_dumps(value: Any) -> bytes:
+        return json.dumps(value, separators=(",", ":")).encode()
+
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# How long cached blueprint definitions stay valid, in seconds
+_BLUEPRINT_CACHE_TTL = 60.0
+
+# Refresh the access token this many seconds before it actually expires, so
+# in-flight requests never race the server-side expiry
+_TOKEN_EXPIRY_SKEW = 30.0
+
+# Retry budget for transient failures (rate limits, server errors, dropped
+# connections mid-response)
+_MAX_RETRIES = 3
+_RETRYABLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
 
 
 class PortClient:
@@ -14,29 +46,99 @@ class PortClient:
         self.port_client_secret = port_client_secret
         self.port_api_url = port_api_url
         self.port_access_token: str | None = None
-        self.token_expiry_time: datetime = datetime.now()
-        self.port_headers: dict[str, str] = {}
-        self.client = httpx.AsyncClient(timeout=httpx.Timeout(60))
+        # Credentials never change, so serialize the auth body once up front
+        self._auth_body = _json_dumps({"clientId": port_client_id, "clientSecret": port_client_secret})
+        self._token_expiry: float = 0.0
+        self._token_lock = asyncio.Lock()
+        self.port_headers = httpx.Headers()
+        # Cached blueprints as (fetched_at, etag, definition); the ETag lets
+        # expired entries revalidate with a cheap 304 instead of a full fetch
+        self._blueprint_cache: dict[str, tuple[float, str | None, dict[str, Any]]] = {}
+        self._blueprint_sem = asyncio.Semaphore(32)
+        # HTTP/2 multiplexes concurrent blueprint searches over one TLS
+        # connection; transport retries cover transient connection errors
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(60),
+            headers={"User-Agent": "port-datalake-exporter"},
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                retries=3,
+                # Keep idle connections around long enough to survive the gaps
+                # between paginated searches instead of re-handshaking TLS
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120),
+            ),
+        )
 
-    async def get_access_token(self) -> tuple[str, datetime]:
-        credentials = {"clientId": self.port_client_id, "clientSecret": self.port_client_secret}
-        token_response = await self.client.post(f"{self.port_api_url}/auth/access_token", json=credentials)
+    async def aclose(self) -> None:
+        """Close the underlying HTTP connection pool."""
+        await self.client.aclose()
+
+    async def __aenter__(self) -> "PortClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def _request_with_retries(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        """Issue a request, retrying transient failures with jittered backoff.
+
+        Retries transport errors and 429/5xx responses, honoring Retry-After
+        when the server sends one. The transport's built-in retries only cover
+        connection establishment, not failed responses or dropped reads.
+        """
+        for attempt in range(_MAX_RETRIES):
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                delay = min(2**attempt, 30) * (0.5 + random.random() / 2)
+                logger.warning(f"Transport error for {method} {url}, retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            if response.status_code not in _RETRYABLE_STATUS_CODES:
+                return response
+            retry_after = response.headers.get("Retry-After", "")
+            if retry_after.isdigit():
+                delay = float(retry_after)
+            else:
+                delay = min(2**attempt, 30) * (0.5 + random.random() / 2)
+            logger.warning(f"Got {response.status_code} for {method} {url}, retrying in {delay:.1f}s")
+            await asyncio.sleep(delay)
+        # Last attempt: let the caller's raise_for_status surface the failure
+        return await self.client.request(method, url, **kwargs)
+
+    async def get_access_token(self) -> tuple[str, float]:
+        token_response = await self._request_with_retries(
+            "POST", f"{self.port_api_url}/auth/access_token", headers=_JSON_HEADERS, content=self._auth_body
+        )
         token_response.raise_for_status()
-        response_data = token_response.json()
+        response_data = _json_loads(token_response.content)
         access_token = response_data["accessToken"]
         expires_in = response_data["expiresIn"]
-        token_expiry_time = datetime.now() + timedelta(seconds=expires_in)
-        return access_token, token_expiry_time
+        token_expiry = time.monotonic() + expires_in - _TOKEN_EXPIRY_SKEW
+        return access_token, token_expiry
 
     async def refresh_access_token(self) -> None:
         logger.info("Refreshing access token...")
-        self.port_access_token, self.token_expiry_time = await self.get_access_token()
-        self.port_headers = {"Authorization": f"Bearer {self.port_access_token}"}
+        self.port_access_token, self._token_expiry = await self.get_access_token()
+        # Build the full header set once per refresh; httpx.Headers keeps the
+        # encoded form around so it isn't re-encoded on every request
+        self.port_headers = httpx.Headers(
+            {
+                "Authorization": f"Bearer {self.port_access_token}",
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            }
+        )
         logger.info("New token received")
 
     async def refresh_token_if_expired(self) -> None:
-        if datetime.now() >= self.token_expiry_time:
-            await self.refresh_access_token()
+        if time.monotonic() < self._token_expiry:
+            return
+        # Serialize refreshes so concurrent exports don't each request a new
+        # token; whoever loses the race re-checks and reuses the fresh one
+        async with self._token_lock:
+            if time.monotonic() >= self._token_expiry:
+                await self.refresh_access_token()
 
     async def search_entities(
         self,
@@ -45,39 +147,169 @@ class PortClient:
         include_entities: list[str] | None = None,
         exclude_entities: list[str] | None = None,
     ) -> AsyncGenerator[list[dict[str, Any]], None]:
-        await self.refresh_token_if_expired()
+        # Fast path: a plain float compare avoids allocating and awaiting a
+        # coroutine on every call while the token is still valid
+        if time.monotonic() >= self._token_expiry:
+            await self.refresh_token_if_expired()
         url = f"{self.port_api_url}/blueprints/{blueprint_identifier}/entities/search"
 
         # Start with the initial search query
         current_query = search_query.copy()
 
+        # Prepare the request payload
+        payload: dict[str, Any] = {"query": current_query}
+        if include_entities:
+            payload["include"] = include_entities
+        if exclude_entities:
+            payload["exclude"] = exclude_entities
+
+        next_task: asyncio.Task[httpx.Response] | None = None
+        try:
+            while True:
+                if next_task is None:
+                    response = await self._request_with_retries(
+                        "POST", url, headers=self.port_headers, content=_json_dumps(payload)
+                    )
+                else:
+                    response = await next_task
+                response.raise_for_status()
+                response_data: dict[str, Any] = _json_loads(response.content)
+
+                # Prefetch the next page before yielding, so the request is in
+                # flight while the caller processes the current page
+                next_cursor = response_data.get("next")
+                if next_cursor:
+                    current_query["from"] = next_cursor
+                    # Re-check the token per page: long paginations can outlive
+                    # its lifetime, and port_headers must be read at request
+                    # time to pick up refreshes from concurrent exports
+                    if time.monotonic() >= self._token_expiry:
+                        await self.refresh_token_if_expired()
+                    next_task = asyncio.create_task(
+                        self._request_with_retries("POST", url, headers=self.port_headers, content=_json_dumps(payload))
+                    )
+                else:
+                    next_task = None
+
+                # Yield the current page of entities
+                yield response_data.get("entities", [])
+
+                if not next_cursor:
+                    break
+        finally:
+            # Don't leak an in-flight request if the consumer stops early
+            if next_task is not None and not next_task.done():
+                next_task.cancel()
+
+    async def iter_search_entities(
+        self,
+        blueprint_identifier: str,
+        search_query: dict[str, Any],
+        include_entities: list[str] | None = None,
+        exclude_entities: list[str] | None = None,
+    ) -> AsyncGenerator[dict[str, Any], None]:
+        """Stream entities one at a time without decoding whole pages.
+
+        Responses are parsed incrementally as their bytes arrive, so even very
+        large pages never materialize as one decoded document. Requires the
+        optional ijson package; use search_entities when it isn't installed.
+        """
+        try:
+            import ijson
+        except ImportError:
+            raise ImportError(
+                "iter_search_entities requires the optional 'ijson' package; "
+                "install it or fall back to search_entities"
+            ) from None
+
+        # Fast path: a plain float compare avoids allocating and awaiting a
+        # coroutine on every call while the token is still valid
+        if time.monotonic() >= self._token_expiry:
+            await self.refresh_token_if_expired()
+        url = f"{self.port_api_url}/blueprints/{blueprint_identifier}/entities/search"
+
+        current_query = search_query.copy()
+        payload: dict[str, Any] = {"query": current_query}
+        if include_entities:
+            payload["include"] = include_entities
+        if exclude_entities:
+            payload["exclude"] = exclude_entities
+
+        @ijson.coroutine  # type: ignore[misc]
+        def _collect(ready: list[dict[str, Any]], state: dict[str, Any]) -> Any:
+            # Build each element of the top-level "entities" array as its
+            # parse events stream in; everything else is skipped except
+            # the pagination cursor
+            builder = None
+            while True:
+                prefix, event, value = yield
+                if prefix == "entities.item" and event == "start_map":
+                    builder = ijson.ObjectBuilder()
+                if builder is not None:
+                    builder.event(event, value)
+                    if prefix == "entities.item" and event == "end_map":
+                        ready.append(builder.value)
+                        builder = None
+                elif prefix == "next":
+                    state["next"] = value
+
         while True:
-            # Prepare the request payload
-            payload: dict[str, Any] = {"query": current_query}
-            if include_entities:
-                payload["include"] = include_entities
-            if exclude_entities:
-                payload["exclude"] = exclude_entities
-
-            response = await self.client.post(url, headers=self.port_headers, json=payload)
-            response.raise_for_status()
-            response_data: dict[str, Any] = response.json()
-
-            # Yield the current page of entities
-            yield response_data.get("entities", [])
-
-            # Check if there's a next page
-            next_cursor = response_data.get("next")
+            ready: list[dict[str, Any]] = []
+            state: dict[str, Any] = {"next": None}
+
+            parser = ijson.parse_coro(_collect(ready, state))
+            async with self.client.stream(
+                "POST", url, headers=self.port_headers, content=_json_dumps(payload)
+            ) as response:
+                response.raise_for_status()
+                async for chunk in response.aiter_bytes():
+                    parser.send(chunk)
+                    for entity in ready:
+                        yield entity
+                    ready.clear()
+            parser.close()
+
+            next_cursor = state["next"]
             if not next_cursor:
                 break
-
-            # Update the query with the next cursor
             current_query["from"] = next_cursor
+            if time.monotonic() >= self._token_expiry:
+                await self.refresh_token_if_expired()
 
     async def get_blueprint(self, blueprint_identifier: str) -> dict[str, Any]:
-        await self.refresh_token_if_expired()
+        cached = self._blueprint_cache.get(blueprint_identifier)
+        if cached and time.monotonic() - cached[0] < _BLUEPRINT_CACHE_TTL:
+            return cached[2]
+
+        # Fast path: a plain float compare avoids allocating and awaiting a
+        # coroutine on every call while the token is still valid
+        if time.monotonic() >= self._token_expiry:
+            await self.refresh_token_if_expired()
         url = f"{self.port_api_url}/blueprints/{blueprint_identifier}"
-        response = await self.client.get(url, headers=self.port_headers)
+        headers = self.port_headers
+        if cached and cached[1]:
+            headers = httpx.Headers(headers)
+            headers["If-None-Match"] = cached[1]
+        response = await self._request_with_retries("GET", url, headers=headers)
+        if cached and response.status_code == 304:
+            # Definition unchanged server-side; just restart the cache window
+            self._blueprint_cache[blueprint_identifier] = (time.monotonic(), cached[1], cached[2])
+            return cached[2]
         response.raise_for_status()
-        response_data: dict[str, Any] = response.json()["blueprint"]
+        response_data: dict[str, Any] = _json_loads(response.content)["blueprint"]
+        self._blueprint_cache[blueprint_identifier] = (time.monotonic(), response.headers.get("ETag"), response_data)
         return response_data
+
+    async def get_blueprints(self, blueprint_identifiers: list[str]) -> dict[str, dict[str, Any]]:
+        """Fetch several blueprints concurrently, keyed by identifier.
+
+        Cached blueprints resolve without a request; the rest are fetched in
+        parallel under a bounded semaphore so a large config doesn't flood
+        the API.
+        """
+
+        async def _get(identifier: str) -> tuple[str, dict[str, Any]]:
+            async with self._blueprint_sem:
+                return identifier, await self.get_blueprint(identifier)
+
+        return dict(await asyncio.gather(*(_get(identifier) for identifier in blueprint_identifiers)))
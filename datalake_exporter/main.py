@@ -1,5 +1,6 @@
 import asyncio
 import json
+from typing import Any
 
 from loguru import logger
 
@@ -7,6 +8,11 @@ from clients.bigquery import BigQueryClient
 from clients.port import PortClient
 from settings import BlueprintConfig, settings
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None  # optional; the default event loop works fine
+
 
 async def export_blueprint(
     port_client: PortClient, bigquery_client: BigQueryClient, blueprint_config: BlueprintConfig
@@ -16,27 +22,50 @@ async def export_blueprint(
 
     logger.info(f"Exporting blueprint: {blueprint_identifier}")
 
-    # Get blueprint schema
-    blueprint = await port_client.get_blueprint(blueprint_identifier)
-    logger.debug(f"Blueprint schema for {blueprint_identifier}: {json.dumps(blueprint.get('schema', {}), indent=2)}")
-    schema = bigquery_client._create_schema_from_blueprint(blueprint)
-
-    # Create or update table
-    await bigquery_client.create_or_update_table(blueprint_identifier, schema)
+    # Build the schema only when the migration mode can actually use it
+    if await bigquery_client.needs_schema(blueprint_identifier):
+        blueprint = await port_client.get_blueprint(blueprint_identifier)
+        logger.opt(lazy=True).debug(
+            "Blueprint schema for {}: {}",
+            lambda: blueprint_identifier,
+            lambda: json.dumps(blueprint.get("schema", {}), indent=2),
+        )
+        schema = bigquery_client._create_schema_from_blueprint(blueprint)
+
+        # Create or update table
+        await bigquery_client.create_or_update_table(blueprint_identifier, schema)
+    else:
+        logger.info(f"Table {blueprint_identifier} already exists, skipping schema build (weak mode)")
 
-    # Search and export entities
+    # Search and export entities, overlapping Port pagination with BigQuery
+    # writes via a bounded producer/consumer queue
+    queue: asyncio.Queue[list[dict[str, Any]] | None] = asyncio.Queue(maxsize=4)
     total_entities = 0
-    async for entities in port_client.search_entities(
-        blueprint_identifier,
-        search_query.model_dump(),
-        include_entities=blueprint_config.include_entities,
-        exclude_entities=blueprint_config.exclude_entities,
-    ):
-        if entities:
-            logger.debug(f"Found {len(entities)} entities for {blueprint_identifier}")
-            await bigquery_client.insert_entities(blueprint_identifier, entities)
-            total_entities += len(entities)
-            logger.info(f"Exported {total_entities} entities so far for blueprint {blueprint_identifier}")
+
+    async def produce_pages() -> None:
+        try:
+            async for entities in port_client.search_entities(
+                blueprint_identifier,
+                search_query.model_dump(),
+                include_entities=blueprint_config.include_entities,
+                exclude_entities=blueprint_config.exclude_entities,
+            ):
+                await queue.put(entities)
+        finally:
+            await queue.put(None)
+
+    async def consume_pages() -> None:
+        nonlocal total_entities
+        while (entities := await queue.get()) is not None:
+            if entities:
+                logger.debug(f"Found {len(entities)} entities for {blueprint_identifier}")
+                # Buffer pages so many small batches coalesce into fewer upserts
+                await bigquery_client.enqueue_entities(blueprint_identifier, entities)
+                total_entities += len(entities)
+                logger.info(f"Exported {total_entities} entities so far for blueprint {blueprint_identifier}")
+
+    await asyncio.gather(produce_pages(), consume_pages())
+    await bigquery_client.flush(blueprint_identifier)
 
     if total_entities > 0:
         logger.info(f"Completed export of {total_entities} entities for blueprint {blueprint_identifier}")
@@ -45,36 +74,40 @@ async def export_blueprint(
 
 
 async def main() -> None:
-    # Initialize clients
-    port_client = PortClient(
+    # Initialize clients; the Port client owns a connection pool, so close it
+    # cleanly when the export finishes or fails
+    async with PortClient(
         port_client_id=settings.PORT_CLIENT_ID,
         port_client_secret=settings.PORT_CLIENT_SECRET,
         port_api_url=settings.PORT_API_URL,
-    )
+    ) as port_client:
+        # Initialize BigQuery client with settings
+        bigquery_client = BigQueryClient(
+            project_id=settings.BIGQUERY_PROJECT_ID,
+            dataset_id=settings.BIGQUERY_DATASET_ID,
+            auto_migrate=settings.AUTO_MIGRATE,
+            credentials=settings.get_google_credentials(),
+        )
 
-    # Initialize BigQuery client with settings
-    bigquery_client = BigQueryClient(
-        project_id=settings.BIGQUERY_PROJECT_ID,
-        dataset_id=settings.BIGQUERY_DATASET_ID,
-        auto_migrate=settings.AUTO_MIGRATE,
-        credentials=settings.get_google_credentials(),
-    )
+        # Get entities config
+        config_data = settings.get_entities_config()
 
-    # Get entities config
-    config_data = settings.get_entities_config()
+        # Export blueprints concurrently; each export is I/O-bound, so overlap
+        # them under a bounded semaphore instead of running strictly sequentially
+        semaphore = asyncio.Semaphore(8)
 
-    # Export each blueprint
-    for blueprint_config in config_data.blueprints:
-        await export_blueprint(port_client, bigquery_client, blueprint_config)
+        async def export_blueprint_bounded(blueprint_config: BlueprintConfig) -> None:
+            async with semaphore:
+                await export_blueprint(port_client, bigquery_client, blueprint_config)
 
-    # Clean up duplicates after all blueprints are processed
-    logger.info("Cleaning up duplicate rows in all tables...")
-    for blueprint_config in config_data.blueprints:
-        await bigquery_client.cleanup_duplicates(blueprint_config.identifier)
-    logger.info("Completed cleanup of all tables")
+        await asyncio.gather(
+            *(export_blueprint_bounded(blueprint_config) for blueprint_config in config_data.blueprints)
+        )
 
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
@@ -1,3 +1,4 @@
+import functools
 from pathlib import Path
 from typing import Any, Literal, cast
 
@@ -27,6 +28,36 @@ class EntitiesConfig(BaseModel):
     blueprints: list[BlueprintConfig]
 
 
+@functools.lru_cache(maxsize=1)
+def _load_google_credentials(credentials_json: str | None, credentials_path: str | None) -> credentials.Credentials:
+    # Parsing and validating service-account material is not free, so load it
+    # once per process instead of on every get_google_credentials call
+    if credentials_json:
+        return cast(
+            credentials.Credentials,
+            service_account.Credentials.from_service_account_info(credentials_json),
+        )
+    elif credentials_path:
+        try:
+            return cast(
+                credentials.Credentials,
+                service_account.Credentials.from_service_account_file(credentials_path),
+            )
+        except exceptions.MalformedError:
+            pass
+
+        return cast(
+            credentials.Credentials,
+            credentials.Credentials.from_authorized_user_file(credentials_path),
+        )
+
+    else:
+        raise ValueError(
+            "Either GOOGLE_APPLICATION_CREDENTIALS or GOOGLE_APPLICATION_CREDENTIALS_JSON "
+            "must be set in the environment"
+        )
+
+
 class Settings(BaseSettings):
     # Port configuration
     PORT_CLIENT_ID: str
@@ -47,30 +78,7 @@ class Settings(BaseSettings):
     GOOGLE_APPLICATION_CREDENTIALS: str | None = None
 
     def get_google_credentials(self) -> credentials.Credentials:
-        if self.GOOGLE_APPLICATION_CREDENTIALS_JSON:
-            return cast(
-                credentials.Credentials,
-                service_account.Credentials.from_service_account_info(self.GOOGLE_APPLICATION_CREDENTIALS_JSON),
-            )
-        elif self.GOOGLE_APPLICATION_CREDENTIALS:
-            try:
-                return cast(
-                    credentials.Credentials,
-                    service_account.Credentials.from_service_account_file(self.GOOGLE_APPLICATION_CREDENTIALS),
-                )
-            except exceptions.MalformedError:
-                pass
-
-            return cast(
-                credentials.Credentials,
-                credentials.Credentials.from_authorized_user_file(self.GOOGLE_APPLICATION_CREDENTIALS),
-            )
-
-        else:
-            raise ValueError(
-                "Either GOOGLE_APPLICATION_CREDENTIALS or GOOGLE_APPLICATION_CREDENTIALS_JSON "
-                "must be set in the environment"
-            )
+        return _load_google_credentials(self.GOOGLE_APPLICATION_CREDENTIALS_JSON, self.GOOGLE_APPLICATION_CREDENTIALS)
 
     def get_entities_config(self) -> EntitiesConfig:
         if self.ENTITIES_CONFIG_JSON: